@@ -1,6 +1,7 @@
 __all__ = (
     '__version__',
     'analyze',
+    'categorize',
     'coerce',
     'fresh_counts',
     'latest',
@@ -18,5 +19,5 @@ __version__ = "0.1.0"
 from .analyzer import analyze, fresh_counts, merge, page_views, summarize
 from .data_manager import latest
 from .month_in_year import MonthInYear, monthly_period
-from .schema import coerce, validate
+from .schema import categorize, coerce, validate
 from .visualizer import plot_requests_and_page_views
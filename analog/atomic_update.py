@@ -52,6 +52,10 @@ class atomic_update(Generic[T]):
 
         try:
             file, self._file = self._file, None
+            if commit:
+                # Make sure the data is on disk before it replaces the target.
+                file.flush()
+                os.fsync(file.fileno())
             file.close()
             if commit:
                 os.replace(self._tmp, self._target)
@@ -57,6 +57,10 @@ class BotDetector:
         for category in categories:
             print('category:', category)
 
+    def clear_cache(self) -> None:
+        """Forget the results of previous tests and lookups."""
+        self._cache.clear()
+
     def test(self, user_agent: str) -> bool:
         """Determine whether the user agent is a bot, caching the result."""
         result = self._cache.get(user_agent)
@@ -1,9 +1,11 @@
 from __future__ import annotations
+from collections import deque
 from collections.abc import Iterator
-import gzip
+from concurrent.futures import Future, ProcessPoolExecutor
 import json
 from operator import itemgetter
 from pathlib import Path
+import pickle
 import shutil
 from typing import Optional
 
@@ -18,7 +20,15 @@ from .error import StorageError
 from .ipaddr import latest_location_db_path
 from .label import APPAREBIT_PAGE_PATHS
 from .month_in_year import MonthInYear
-from .parser import enrich, LineParser, parse_common_log_format, parse_all_lines
+from .parser import (
+    enrich,
+    LineParser,
+    LogData,
+    parse_common_log_format,
+    parse_all_lines,
+    read_log_lines,
+    save_hostnames,
+)
 from .schema import coerce
 
 
@@ -138,6 +148,29 @@ class Coverage:
 # --------------------------------------------------------------------------------------
 
 
+# The number of monthly logs parsed ahead of enrichment. Each parsed log stays
+# in memory until it has been enriched, so this number also bounds memory.
+_PARSE_AHEAD = 2
+
+
+def _parse_log(path: Path, line_parser: LineParser) -> LogData:
+    """Parse the access log at the given path. This function runs in workers."""
+    return parse_all_lines(read_log_lines(path), line_parser)
+
+
+def _access_log_name(path: Path) -> str:
+    """Get the name of the access log without the optional ".gz" suffix."""
+    return path.name.removesuffix(".gz")
+
+
+def _is_picklable(value: object) -> bool:
+    try:
+        pickle.dumps(value)
+    except Exception:
+        return False
+    return True
+
+
 class DataManager:
     """A data manager."""
 
@@ -156,6 +189,12 @@ class DataManager:
         root: Path,
         line_parser: LineParser = parse_common_log_format,
     ) -> None:
+        """
+        Create a new data manager for the given root directory. If the line
+        parser can be pickled, e.g., because it is a module-level function,
+        the data manager parses several monthly logs in worker processes.
+        Otherwise, it parses them one after the other in this process.
+        """
         # Set up this data manager's configuration state.
         self._root = root
         DataManager._check_directory_exists(root, is_root=True)
@@ -166,7 +205,13 @@ class DataManager:
         self._enriched_log_path = root / "enriched-logs"
         self._enriched_log_path.mkdir(exist_ok=True)
 
-        self._hostname_db_path = root / "hostnames.json"
+        self._hostname_db_path = root / "hostnames.jsonl"
+        legacy_hostname_db_path = root / "hostnames.json"
+        if legacy_hostname_db_path.exists() and not self._hostname_db_path.exists():
+            # Convert the hostname database from a single JSON object to JSON lines.
+            with open(legacy_hostname_db_path, mode="r", encoding="utf8") as file:
+                save_hostnames(self._hostname_db_path, json.load(file))
+
         location_database_path = root / "location-db"
         DataManager._check_directory_exists(location_database_path, is_root=False)
         self._location_db_path = latest_location_db_path(location_database_path)
@@ -197,8 +242,9 @@ class DataManager:
 
     def _parse_access_log_name(self, path: Path) -> MonthInYear:
         """Parse name of log file into domain and month of year."""
-        month_in_year = MonthInYear.of(path.stem[-8:])
-        domain = path.stem[:-17]
+        name = _access_log_name(path)
+        month_in_year = MonthInYear.of(name[-8:])
+        domain = name[:-17]
         if self._domain is None:
             self._domain = domain
         if self._domain == domain:
@@ -214,9 +260,9 @@ class DataManager:
         Parse and enrich the access log at the given path, convert the result to
         a dataframe and return it.
         """
-        with gzip.open(path, mode="rt", encoding="utf8") as lines:
-            log_data = parse_all_lines(lines, self._line_parser)
+        return self._enrich_log(_parse_log(path, self._line_parser))
 
+    def _enrich_log(self, log_data: LogData) -> pd.DataFrame:
         enrich(log_data, self._hostname_db_path, self._location_db_path)
         return coerce(pd.DataFrame(log_data))
 
@@ -225,35 +271,82 @@ class DataManager:
         Ingest all access logs by parsing and enriching monthly log files. This method
         skips a monthly log if a Parquet file with the enriched data already exists.
         """
-        # Process access logs in chronological order.
+        # Process access logs in chronological order. They may be compressed.
         source_paths = sorted(
-            self._access_log_path.glob("*-ssl_log-???-????.gz"),
-            key=lambda p: MonthInYear.of(p.stem[-8:]),
+            (
+                *self._access_log_path.glob("*-ssl_log-???-????.gz"),
+                *self._access_log_path.glob("*-ssl_log-???-????"),
+            ),
+            key=lambda p: MonthInYear.of(_access_log_name(p)[-8:]),
         )
 
-        did_ingest_access_log = False
+        pending: list[tuple[MonthInYear, Path, Path]] = []
+        previous: Optional[MonthInYear] = None
         for source_path in source_paths:
             if not source_path.is_file():
                 continue
 
             month_in_year = self._parse_access_log_name(source_path)
+            if month_in_year == previous:
+                raise StorageError(
+                    f'"{self._access_log_path}" contains two access logs '
+                    f'for {month_in_year}'
+                )
+            previous = month_in_year
             target_path = (
                 self._enriched_log_path / f"{self._domain}-{month_in_year}.parquet"
             )
-            if target_path.exists():
-                continue
+            if not target_path.exists():
+                pending.append((month_in_year, source_path, target_path))
 
-            konsole.info(
-                "Ingest request data for %s",
-                month_in_year,
-                detail={"from": source_path, "to": target_path},
-            )
+        if len(pending) > 1 and _is_picklable(self._line_parser):
+            self._ingest_in_parallel(pending)
+        else:
+            for month_in_year, source_path, target_path in pending:
+                self._log_ingestion(month_in_year, source_path, target_path)
+                self.parse_and_enrich_log(source_path).to_parquet(target_path)
 
-            df = self.parse_and_enrich_log(source_path)
-            df.to_parquet(target_path)
-            did_ingest_access_log = True
+        self._did_ingest_access_log = bool(pending)
 
-        self._did_ingest_access_log = did_ingest_access_log
+    @staticmethod
+    def _log_ingestion(
+        month_in_year: MonthInYear, source_path: Path, target_path: Path
+    ) -> None:
+        konsole.info(
+            "Ingest request data for %s",
+            month_in_year,
+            detail={"from": source_path, "to": target_path},
+        )
+
+    def _ingest_in_parallel(
+        self, pending: list[tuple[MonthInYear, Path, Path]]
+    ) -> None:
+        # Parsing is CPU-bound and independent between monthly logs. Hence it
+        # runs in worker processes. Enrichment updates the hostname database
+        # and hence runs in this process, one monthly log at a time and in
+        # chronological order. To bound memory, only _PARSE_AHEAD logs are
+        # parsed ahead.
+        workers = min(len(pending), _PARSE_AHEAD)
+        todo = iter(pending)
+        in_flight: deque[tuple[MonthInYear, Path, Path, Future[LogData]]] = deque()
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+
+            def submit_next() -> None:
+                if (job := next(todo, None)) is not None:
+                    month_in_year, source_path, target_path = job
+                    future = executor.submit(_parse_log, source_path, self._line_parser)
+                    in_flight.append((month_in_year, source_path, target_path, future))
+
+            for _ in range(workers):
+                submit_next()
+
+            while in_flight:
+                month_in_year, source_path, target_path, future = in_flight.popleft()
+                submit_next()
+
+                self._log_ingestion(month_in_year, source_path, target_path)
+                self._enrich_log(future.result()).to_parquet(target_path)
 
     def _write_incrementally(self, coverage: Coverage, target_path: Path) -> None:
         # Table.from_pandas() doesn't just translate from Pandas' column
@@ -1,6 +1,5 @@
 from __future__ import annotations
 from enum import auto, Enum
-import os.path
 
 
 class EnumLabel(str, Enum):
@@ -18,7 +17,7 @@ class EnumLabel(str, Enum):
         return name
 
     def __str__(self) -> str:
-        return self.value
+        return self._value_
 
 
 class HttpScheme(EnumLabel):
@@ -85,8 +84,23 @@ class ContentType(EnumLabel):
         elif path[-1] == "/":
             return ContentType.DIRECTORY
 
-        _, extension = os.path.splitext(path)
-        return _EXTENSION_2_CONTENT_TYPE.get(extension, ContentType.UNKNOWN)
+        return _EXTENSION_2_CONTENT_TYPE.get(_extension_of(path), ContentType.UNKNOWN)
+
+
+def _extension_of(path: str) -> str:
+    """
+    Determine the extension of a URL path. This function has the same semantics
+    as `posixpath.splitext()`, i.e., the extension starts with the last dot in
+    the last segment, unless all characters before that dot are dots too. But
+    it is considerably faster.
+    """
+    dot = path.rfind('.')
+    slash = path.rfind('/')
+    if dot > slash + 1 and (
+        path[slash + 1] != '.' or path[slash + 1 : dot].lstrip('.')
+    ):
+        return path[dot:]
+    return ''
 
 
 _PATH_2_CONTENT_TYPE = {
@@ -160,15 +174,16 @@ class HttpStatus(EnumLabel):
 
     @staticmethod
     def of(status: int) -> HttpStatus:
-        if 100 <= status < 200:
-            return HttpStatus.INFORMATIONAL
-        elif 200 <= status < 300:
-            return HttpStatus.SUCCESSFUL
-        elif 300 <= status < 400:
-            return HttpStatus.REDIRECTED
-        elif 400 <= status < 500:
-            return HttpStatus.CLIENT_ERROR
-        elif 500 <= status < 600:
-            return HttpStatus.SERVER_ERROR
+        if 100 <= status < 600:
+            return _HTTP_STATUS_CLASSES[status // 100 - 1]
 
         raise ValueError(f"Invalid HTTP status {status}")
+
+
+_HTTP_STATUS_CLASSES = (
+    HttpStatus.INFORMATIONAL,
+    HttpStatus.SUCCESSFUL,
+    HttpStatus.REDIRECTED,
+    HttpStatus.CLIENT_ERROR,
+    HttpStatus.SERVER_ERROR,
+)
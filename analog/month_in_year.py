@@ -1,5 +1,5 @@
 from __future__ import annotations
-from calendar import month_abbr, monthrange
+from calendar import isleap, month_abbr
 from datetime import datetime, timedelta, timezone, tzinfo
 from typing import Literal, NamedTuple, overload, Protocol, runtime_checkable, TYPE_CHECKING
 
@@ -22,6 +22,8 @@ SHORT_MONTHS = (
     "dec",
 )
 
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
 
 @runtime_checkable
 class MonthInYearly(Protocol):
@@ -65,11 +67,14 @@ class MonthInYear(NamedTuple):
         month-in-yearly instance into a proper month-in-year.
         """
 
-        if isinstance(value, MonthInYearly):
+        if not isinstance(value, str):
+            # Check for concrete types first, since checking for a runtime
+            # protocol is slow. Pandas' timestamps are datetimes, too.
+            assert isinstance(value, (MonthInYear, datetime)) or isinstance(
+                value, MonthInYearly
+            ), f'value "{value}" of type {type(value)}'
             return cls(value.year, value.month)
 
-        assert isinstance(value, str), f'value "{value}" of type {type(value)}'
-
         if len(value) == 8:
             # mmm-yyy format
             try:
@@ -79,17 +84,23 @@ class MonthInYear(NamedTuple):
 
         if len(value) == 7:
             # yyyy-mm format
-            try:
-                return cls(int(value[:4]), int(value[-2:]))
-            except:
-                raise ValueError(f'malformed yyyy-mm string "{value}"')
+            if (
+                value.isascii()
+                and value[4] == '-'
+                and value[:4].isdigit()
+                and value[5:].isdigit()
+            ):
+                return cls(int(value[:4]), int(value[5:]))
+            raise ValueError(f'malformed yyyy-mm string "{value}"')
 
         raise ValueError(f'invalid month-in-year string "{value}"')
 
     def days(self) -> int:
         """Get number of days for this month in year."""
-        _, days = monthrange(self.year, self.month)
-        return days
+        month = self.month
+        if not 1 <= month <= 12:
+            raise ValueError(f'invalid month {month}')
+        return _DAYS_IN_MONTH[month - 1] + (month == 2 and isleap(self.year))
 
     def __str__(self) -> str:
         return f"{self.year:04}-{self.month:02}"
@@ -125,7 +136,9 @@ class MonthInYear(NamedTuple):
                 year -= 1
                 month += 12
             return type(self)(year, month)
-        if isinstance(other, MonthInYearly):
+        if isinstance(other, (MonthInYear, datetime)) or isinstance(
+            other, MonthInYearly
+        ):
             return (self.year - other.year) * 12 + (self.month - other.month)
         return NotImplemented
 
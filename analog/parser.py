@@ -1,15 +1,23 @@
 from __future__ import annotations
+from array import array
 from collections import defaultdict
-from collections.abc import Iterator
-from datetime import datetime, timezone
+from collections.abc import Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import cache, lru_cache
+import gzip
 import json
 import math
+from operator import itemgetter
 import os
 from pathlib import Path
 import re
 import socket
+import time
 from typing import Any, Callable, cast, Optional, TypeAlias
 
+import numpy as np
+
 from geoip2.database import Reader as LocationDatabaseReader
 from geoip2.errors import AddressNotFoundError
 from geoip2.models import City as LocationData
@@ -26,6 +34,8 @@ from .label import (
     HttpScheme,
     HttpStatus,
 )
+from .month_in_year import SHORT_MONTHS
+from .schema import ACCESS_LOG_COLUMNS, DERIVED_COLUMNS, ENRICHED_COLUMNS
 
 
 # ======================================================================================
@@ -66,9 +76,8 @@ _IP_ADDRESS = (
     r"|(?: [0-9a-fA-F]{1,4} (?: [:][:]? [0-9a-fA-F]{1,4})* )"
 )
 
-# Also recognizes combined log format and virtual host
-COMMON_LOG_FORMAT = re.compile(
-    fr"""
+# The mandatory fields of the common log format.
+_COMMON_LOG_FORMAT_HEAD = fr"""
     ^
     (?P<client_address> {_IP_ADDRESS})
     [ ]-[ ]-[ ]
@@ -90,6 +99,10 @@ COMMON_LOG_FORMAT = re.compile(
     (?P<status> \d{{3}})
     [ ]
     (?P<size> - | \d+)
+"""
+
+# The optional fields of the combined log format and virtual host.
+_COMMON_LOG_FORMAT_TAIL = fr"""
     # Combined Log Format
     (?:
         [ ]
@@ -105,10 +118,19 @@ COMMON_LOG_FORMAT = re.compile(
         (?P<server_address> {_IP_ADDRESS})
     )?
     $
-    """,
-    re.X,
+"""
+
+# Also recognizes combined log format and virtual host
+COMMON_LOG_FORMAT = re.compile(
+    _COMMON_LOG_FORMAT_HEAD + _COMMON_LOG_FORMAT_TAIL,
+    re.X | re.ASCII,
 )
 
+# The same pattern split in two, so that the head can be matched without
+# the tail's alternatives and the tail only needs to scan what remains.
+_COMMON_LOG_FORMAT_HEAD_PATTERN = re.compile(_COMMON_LOG_FORMAT_HEAD, re.X | re.ASCII)
+_COMMON_LOG_FORMAT_TAIL_PATTERN = re.compile(_COMMON_LOG_FORMAT_TAIL, re.X | re.ASCII)
+
 
 _REFERRER = re.compile(
     r"""
@@ -121,10 +143,27 @@ _REFERRER = re.compile(
         (?P<fragment> [#].*)?
     $
     """,
-    re.X,
+    re.X | re.ASCII,
 )
 
 
+# Log lines almost always use upper case methods, but the grammar admits any
+# case. The table covers upper and lower case, falling back on upper-casing.
+_METHODS = {
+    name: method
+    for method in HttpMethod
+    for name in (method.value, method.value.lower())
+}
+
+# _REFERRER only matches lower case schemes.
+_SCHEMES = {scheme.value: scheme for scheme in HttpScheme}
+
+_PROTOCOLS = {protocol.value: protocol for protocol in HttpProtocol}
+
+# A log has far fewer distinct paths than requests.
+_content_type_of = lru_cache(maxsize=1 << 14)(ContentType.of)
+
+
 def unquote(quoted: str | None) -> Optional[str]:
     """
     Unquote the given double-quoted string. If the argument is `None`, a dash
@@ -135,66 +174,373 @@ def unquote(quoted: str | None) -> Optional[str]:
     return quoted[1:-1]
 
 
+# A pool of strings, so that all occurrences of the same value share one
+# object. Unlike sys.intern(), which keeps strings alive for the rest of the
+# process on some Python versions, a pool lives only as long as the data it
+# deduplicates. That matters, since clients control many of the values.
+StringPool: TypeAlias = dict[str, str]
+
+
+def _pooled(text: str | None, pool: Optional[StringPool]) -> Optional[str]:
+    """Look up the given string in the pool, adding it if necessary."""
+    if text is None or pool is None:
+        return text
+    return pool.setdefault(text, text)
+
+
 def to_cool_path(path: str) -> str:
     """Make the path suitable for inclusion in a cool URL."""
-    if path.endswith('/index.html'):
-        path = path[:-11]
-    elif path.endswith('.html'):
-        path = path[:-5]
-    if path == '':
-        path = '/'
-    return path
+    cool_path = path.removesuffix('/index.html')
+    if len(cool_path) == len(path):
+        cool_path = path.removesuffix('.html')
+    return cool_path or '/'
+
+
+_IP_ADDRESS_PATTERN = re.compile(_IP_ADDRESS, re.X | re.ASCII)
+_HOST_NAME_PATTERN = re.compile(_HOST_NAME, re.ASCII)
+
+
+def _split_common_log_format(line: str) -> dict[str, Any] | None:
+    """
+    Split a line in common log format into its fields by searching for the
+    delimiters between fields. This function only handles lines without escape
+    sequences and returns `None` for any line that doesn't look exactly as
+    expected, leaving the hard cases to `COMMON_LOG_FORMAT`. When it does
+    return fields, they are the same as the regular expression's groups.
+    """
+    if '\\' in line:
+        return None
+    if line.endswith('\n'):
+        line = line[:-1]
+
+    # client_address - - [timestamp] "
+    cursor = line.find(' - - [')
+    client_address = line[:cursor]
+    if cursor <= 0 or not _IP_ADDRESS_PATTERN.fullmatch(client_address):
+        return None
+
+    start = cursor + 6
+    cursor = line.find(']', start)
+    if cursor <= start or not line.startswith(' "', cursor + 1):
+        return None
+    timestamp = line[start:cursor]
+
+    # method path?query#fragment HTTP/protocol"
+    start = cursor + 3
+    cursor = line.find(' ', start)
+    method = line[start:cursor]
+    if cursor < 0 or not (method.isascii() and method.isalpha()):
+        return None
+
+    start = cursor + 1
+    cursor = line.find(' ', start)
+    if cursor < 0 or not line.startswith('HTTP/', cursor + 1):
+        return None
+    path = line[start:cursor]
+    protocol = line[cursor + 6 : cursor + 9]
+    if protocol not in _PROTOCOLS or not line.startswith('" ', cursor + 9):
+        return None
+
+    fragment = None
+    if (index := path.find('#')) >= 0:
+        path, fragment = path[:index], path[index:]
+    query = None
+    if (index := path.find('?')) >= 0:
+        path, query = path[:index], path[index:]
+
+    # status size
+    start = cursor + 11
+    status = line[start : start + 3]
+    if not line.startswith(' ', start + 3) or not (
+        status.isascii() and status.isdigit()
+    ):
+        return None
+
+    start += 4
+    cursor = line.find(' ', start)
+    if cursor < 0:
+        cursor = len(line)
+    size = line[start:cursor]
+    if size != '-' and not (size.isascii() and size.isdigit()):
+        return None
+
+    # Combined log format: "referrer" "user_agent"
+    referrer = user_agent = None
+    if line.startswith(' "', cursor):
+        start = cursor + 1
+        cursor = line.find('"', start + 1)
+        if cursor < 0 or not line.startswith(' "', cursor + 1):
+            return None
+        referrer = line[start : cursor + 1]
+
+        start = cursor + 2
+        cursor = line.find('"', start + 1)
+        if cursor < 0:
+            return None
+        user_agent = line[start : cursor + 1]
+        cursor += 1
+
+    # Virtual host: server_name server_address
+    server_name = server_address = None
+    if cursor < len(line):
+        vhost = line[cursor:].split(' ')
+        if (
+            len(vhost) != 3
+            or vhost[0]
+            or not _HOST_NAME_PATTERN.fullmatch(server_name := vhost[1])
+            or not _IP_ADDRESS_PATTERN.fullmatch(server_address := vhost[2])
+        ):
+            return None
+
+    return {
+        'client_address': client_address,
+        'timestamp': timestamp,
+        'method': method,
+        'path': path,
+        'query': query,
+        'fragment': fragment,
+        'protocol': protocol,
+        'status': status,
+        'size': size,
+        'referrer': referrer,
+        'user_agent': user_agent,
+        'server_name': server_name,
+        'server_address': server_address,
+    }
+
+
+_MONTH_NUMBERS = {
+    month.capitalize(): number for number, month in enumerate(SHORT_MONTHS, start=1)
+}
+_TIMEZONES: dict[str, timezone] = {}
+
+
+def _parse_timestamp(text: str) -> datetime:
+    month = _MONTH_NUMBERS.get(text[3:6])
+    if (
+        month is None
+        or len(text) != 26
+        or text[2] != '/'
+        or text[6] != '/'
+        or text[11] != ':'
+        or text[14] != ':'
+        or text[17] != ':'
+        or text[20] != ' '
+        or text[21] not in '+-'
+        or text[24] > '5'
+        or not (
+            (
+                digits := text[:2]
+                + text[7:11]
+                + text[12:14]
+                + text[15:17]
+                + text[18:20]
+                + text[22:]
+            ).isascii()
+            and digits.isdigit()
+        )
+    ):
+        return datetime.strptime(text, '%d/%b/%Y:%H:%M:%S %z').astimezone(timezone.utc)
+
+    offset = text[21:]
+    tz = _TIMEZONES.get(offset)
+    if tz is None:
+        tz = _TIMEZONES[offset] = timezone(
+            timedelta(hours=int(offset[:3]), minutes=int(offset[0] + offset[3:]))
+        )
+
+    return datetime(
+        int(text[7:11]),
+        month,
+        int(text[:2]),
+        int(text[12:14]),
+        int(text[15:17]),
+        int(text[18:20]),
+        tzinfo=tz,
+    ).astimezone(timezone.utc)
+
+
+# Busy sites log many requests per second, all with the same timestamp. Since
+# datetimes are immutable, they can safely be shared between records.
+_TIMESTAMPS: dict[str, datetime] = {}
+_MAX_TIMESTAMPS = 1 << 16
+
+
+def parse_timestamp(text: str) -> datetime:
+    """
+    Parse a timestamp in common log format, e.g., `13/Aug/2022:01:02:03 +0000`,
+    into a UTC datetime. This function slices the canonical, fixed-width form
+    by hand and falls back on `datetime.strptime()` for all other forms. It also
+    memoizes recently parsed timestamps.
+    """
+    timestamp = _TIMESTAMPS.get(text)
+    if timestamp is None:
+        timestamp = _parse_timestamp(text)
+        if len(_TIMESTAMPS) >= _MAX_TIMESTAMPS:
+            _TIMESTAMPS.clear()
+        _TIMESTAMPS[text] = timestamp
+    return timestamp
 
 
 def parse_common_log_format(line: str) -> dict[str, Any] | None:
     """Parse the fields of a line in common log format."""
-    match = COMMON_LOG_FORMAT.match(line)
-    return match.groupdict() if match else None
+    fields = _split_common_log_format(line)
+    if fields is not None:
+        return fields
+
+    head = _COMMON_LOG_FORMAT_HEAD_PATTERN.match(line)
+    if head is None:
+        return None
+    tail = _COMMON_LOG_FORMAT_TAIL_PATTERN.match(line, head.end())
+    if tail is None:
+        return None
+    return head.groupdict() | tail.groupdict()
 
 
-def coerce_log_record(fields: dict[str, Any]) -> dict[str, Any]:
-    """Coerce the fields of a log record into expected representation."""
+def coerce_log_record(
+    fields: dict[str, Any], pool: Optional[StringPool] = None
+) -> dict[str, Any]:
+    """
+    Coerce the fields of a log record into expected representation. If a
+    string pool is given, repeated referrers, user agents, server names, and
+    server addresses share one object.
+    """
     # client_address unchanged
-    fields['timestamp'] = datetime.strptime(
-        fields['timestamp'], '%d/%b/%Y:%H:%M:%S %z'
-    ).astimezone(timezone.utc)
-    fields['method'] = HttpMethod[fields['method'].upper()]
+    fields['timestamp'] = parse_timestamp(fields['timestamp'])
+    method = fields['method']
+    fields['method'] = _METHODS.get(method) or HttpMethod[method.upper()]
     fields['path'] = path if (path := fields['path']) != '' else '/'
     # query unchanged
     # fragment unchanged
-    fields['protocol'] = HttpProtocol(fields['protocol'])
+    protocol = fields['protocol']
+    fields['protocol'] = _PROTOCOLS.get(protocol) or HttpProtocol(protocol)
     fields['status'] = int(fields['status'])
     fields['size'] = int(text) if (text := fields['size']) != '-' else 0
-    fields['referrer'] = unquote(fields['referrer'])
-    fields['user_agent'] = unquote(fields['user_agent'])
-    fields['server_name'] = name.lower() if (name := fields['server_name']) else None
-    # server_address unchanged
+    fields['referrer'] = _pooled(unquote(fields['referrer']), pool)
+    fields['user_agent'] = _pooled(unquote(fields['user_agent']), pool)
+    fields['server_name'] = (
+        _pooled(name.lower(), pool) if (name := fields['server_name']) else None
+    )
+    fields['server_address'] = _pooled(fields['server_address'], pool)
     return fields
 
 
-def fill_log_record(fields: dict[str, Any]) -> dict[str, Any]:
-    """Derrive additional fields with little overhead to simplify analysis."""
+_ReferrerParts: TypeAlias = tuple[str, str, Optional[str], Optional[str], Optional[str]]
+
+
+def _split_referrer(referrer: str) -> Optional[_ReferrerParts]:
+    """
+    Split an HTTP(S) referrer into scheme, host, path, query, and fragment.
+    This function produces the same result as the `_REFERRER` regex but uses
+    string partitioning only. It returns `None` if the referrer is no HTTP(S)
+    URL.
+    """
+    if '\n' in referrer:
+        # Defer to the regex, which treats newlines specially.
+        match = _REFERRER.match(referrer)
+        if match is None:
+            return None
+        return cast(_ReferrerParts, match.group(*_REFERRER.groupindex))
+
+    scheme, separator, rest = referrer.partition('://')
+    if not separator or (scheme != 'http' and scheme != 'https'):
+        return None
+
+    rest, hash_mark, fragment = rest.partition('#')
+    rest, question_mark, query = rest.partition('?')
+    host, slash, path = rest.partition('/')
+    return (
+        scheme,
+        host,
+        slash + path if slash else None,
+        question_mark + query if question_mark else None,
+        hash_mark + fragment if hash_mark else None,
+    )
+
+
+def fill_log_record(
+    fields: dict[str, Any], pool: Optional[StringPool] = None
+) -> dict[str, Any]:
+    """
+    Derrive additional fields with little overhead to simplify analysis. If a
+    string pool is given, repeated referrer hosts share one object.
+    """
     # From path:
     path = fields['path']
     fields['cool_path'] = to_cool_path(path)
-    fields['content_type'] = ContentType.of(path)
+    fields['content_type'] = _content_type_of(path)
 
     # From status:
     fields['status_class'] = HttpStatus.of(fields['status'])
 
     # From referrer:
-    ref = _REFERRER.match(referrer) if (referrer := fields['referrer']) else None
-    fields['referrer_scheme'] = HttpScheme(ref.group('scheme').lower()) if ref else None
-    fields['referrer_host'] = ref.group('host').lower() if ref else None
-    fields['referrer_path'] = ref.group('path') if ref else None
-    fields['referrer_query'] = ref.group('query') if ref else None
-    fields['referrer_fragment'] = ref.group('fragment') if ref else None
+    ref = _split_referrer(referrer) if (referrer := fields['referrer']) else None
+    if ref is None:
+        fields['referrer_scheme'] = None
+        fields['referrer_host'] = None
+        fields['referrer_path'] = None
+        fields['referrer_query'] = None
+        fields['referrer_fragment'] = None
+    else:
+        scheme, host, ref_path, query, fragment = ref
+        fields['referrer_scheme'] = _SCHEMES[scheme]
+        fields['referrer_host'] = _pooled(host.lower(), pool)
+        fields['referrer_path'] = ref_path
+        fields['referrer_query'] = query
+        fields['referrer_fragment'] = fragment
 
     return fields
 
 
 LineParser = Callable[[str], dict[str, Any] | None]
-LogData: TypeAlias = defaultdict[str, list[Any]]
+LogData: TypeAlias = defaultdict[str, list[Any] | np.ndarray]
+
+
+def read_log_lines(path: Path) -> Iterator[str]:
+    """
+    Iterate over the lines of the log file at the given path. A gzip-compressed
+    log is decompressed on the fly. Either way, lines are decoded in large
+    chunks and end with a newline, unless the file lacks a final newline, with
+    carriage returns translated like Python's universal newlines.
+    """
+    if path.suffix == '.gz':
+        with gzip.open(path, mode='rt', encoding='utf8') as file:
+            yield from file
+    else:
+        with open(path, mode='rt', encoding='utf8') as file:
+            yield from file
+
+
+# The columns of parsed log records, in order.
+_COLUMNS = (*ACCESS_LOG_COLUMNS, *DERIVED_COLUMNS)
+_get_columns = itemgetter(*_COLUMNS)
+
+# Integral columns are accumulated as unboxed machine integers. A status fits
+# into a short, matching the schema. A size may exceed the schema's 32 bits.
+_TYPECODES = {'status': 'h', 'size': 'q'}
+
+
+def _generate_row_appender(width: int) -> Callable[..., None]:
+    """
+    Generate a function that appends each row of the given width to the given
+    columns, with one straight-line call per column. The function takes the
+    rows followed by one append method per column.
+    """
+    appenders = ', '.join(f'append{index}' for index in range(width))
+    values = ', '.join(f'value{index}' for index in range(width))
+    calls = ''.join(f'        append{index}(value{index})\n' for index in range(width))
+    source = (
+        f'def append_rows(rows, {appenders}):\n'
+        f'    for {values} in rows:\n'
+        f'{calls}'
+    )
+
+    namespace: dict[str, Any] = {}
+    exec(source, namespace)
+    return cast(Callable[..., None], namespace['append_rows'])
+
+
+_append_rows = _generate_row_appender(len(_COLUMNS))
 
 
 def parse_all_lines(
@@ -202,17 +548,28 @@ def parse_all_lines(
     parse_line: LineParser = parse_common_log_format,
 ) -> LogData:
     """Parse all lines in a log."""
-    log_data: LogData = defaultdict(list)
+    columns: list[list[Any] | array[int]] = [
+        array(_TYPECODES[name]) if name in _TYPECODES else [] for name in _COLUMNS
+    ]
+    pool: StringPool = {}
 
-    for index, line in enumerate(lines):
-        log_record = parse_line(line)
-        if log_record is None:
-            raise ParseError(f'invalid log line {index + 1} "{line}"')
+    def rows() -> Iterator[tuple[Any, ...]]:
+        for index, line in enumerate(lines):
+            log_record = parse_line(line)
+            if log_record is None:
+                raise ParseError(f'invalid log line {index + 1} "{line}"')
+            coerce_log_record(log_record, pool)
+            yield _get_columns(fill_log_record(log_record, pool))
 
-        log_record = fill_log_record(coerce_log_record(log_record))
-        for key, value in log_record.items():
-            log_data[key].append(value)
+    _append_rows(rows(), *(column.append for column in columns))
 
+    log_data: LogData = defaultdict(list)
+    for name, column in zip(_COLUMNS, columns):
+        log_data[name] = (
+            np.frombuffer(column, dtype=column.typecode)
+            if isinstance(column, array)
+            else column
+        )
     return log_data
 
 
@@ -221,28 +578,130 @@ def parse_all_lines(
 # ======================================================================================
 
 
-def enrich_client_name(log_data: LogData, hostname_db: Path) -> None:
+def _resolve_hostname(address: str) -> Optional[str]:
+    """Look up the hostname for the IP address, returning `None` on failure."""
+    try:
+        return socket.gethostbyaddr(address)[0].lower()
+    except socket.error:
+        return None
+
+
+# Reverse DNS lookups spend nearly all their time waiting on the network and
+# release the GIL while doing so. Hence a generously sized thread pool resolves
+# many addresses concurrently.
+_MAX_RESOLVER_THREADS = 64
+
+
+# The hostname database is a log of JSON objects, one per line, that map IP
+# addresses to hostnames. Each run only appends newly resolved addresses and
+# thus avoids serializing the entire database again. The database is compacted
+# only when it holds mostly redundant entries or was damaged by an interrupted
+# write.
+
+HostnameDB: TypeAlias = dict[str, Optional[str]]
+
+# orjson is optional but considerably faster than the standard library.
+try:
+    import orjson
+
+    def _dump_json_line(value: object) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_APPEND_NEWLINE)
+
+    _load_json_line: Callable[[bytes], Any] = orjson.loads
+
+except ImportError:
+
+    def _dump_json_line(value: object) -> bytes:
+        return json.dumps(value).encode('utf8') + b'\n'
+
+    _load_json_line = json.loads
+
+
+# Failed lookups are recorded with the time of the lookup, in seconds since the
+# epoch, and retried once that time is older than the following period, since
+# addresses may well gain reverse DNS entries later on.
+HOSTNAME_MISS_TTL = 30 * 24 * 60 * 60
+
+
+def _format_hostname(address: str, name: Optional[str], checked: int) -> bytes:
+    if name is None:
+        return _dump_json_line({'ip': address, 'name': None, 'checked': checked})
+    return _dump_json_line({'ip': address, 'name': name})
+
+
+def load_hostnames(hostname_db: Path) -> tuple[HostnameDB, dict[str, int], bool]:
+    """
+    Load the hostname database. This function returns the mapping from IP
+    addresses to hostnames, the times at which failed lookups were made, and a
+    flag indicating whether the database on disk should be compacted.
+    """
+    hostnames: HostnameDB = {}
+    checked: dict[str, int] = {}
+    entries = 0
+    is_damaged = False
+
     try:
-        with open(hostname_db, mode='r', encoding='utf8') as file:
-            hostnames = json.load(file)
+        with open(hostname_db, mode='rb') as file:
+            for line in file:
+                entries += 1
+                try:
+                    entry = _load_json_line(line)
+                except ValueError:
+                    is_damaged = True
+                    continue
+
+                address = entry['ip']
+                name = hostnames[address] = entry['name']
+                if name is None:
+                    checked[address] = entry.get('checked', 0)
+                else:
+                    checked.pop(address, None)
     except FileNotFoundError:
-        hostnames = {}
+        pass
 
-    names = log_data['client_name']
-    assert not names
+    return hostnames, checked, is_damaged or entries > 2 * len(hostnames)
 
-    for address in log_data['client_address']:
-        if address not in hostnames:
-            try:
-                hostnames[address] = socket.gethostbyaddr(address)[0].lower()
-            except socket.error:
-                hostnames[address] = None
 
-        names.append(hostnames[address])
+def save_hostnames(
+    hostname_db: Path,
+    hostnames: HostnameDB,
+    checked: Optional[Mapping[str, int]] = None,
+) -> None:
+    """
+    Atomically replace the hostname database with the given mapping. Failed
+    lookups without a recorded time are retried on the next run.
+    """
+    checked = checked or {}
+    with atomic_update(hostname_db, text=False) as file:
+        file.writelines(
+            _format_hostname(a, n, checked.get(a, 0)) for a, n in hostnames.items()
+        )
 
-    with atomic_update(hostname_db) as file:
-        json.dump(hostnames, file, indent=0, sort_keys=True)
 
+def enrich_client_name(log_data: LogData, hostname_db: Path) -> None:
+    hostnames, checked, needs_compaction = load_hostnames(hostname_db)
+    if needs_compaction:
+        save_hostnames(hostname_db, hostnames, checked)
+
+    assert not log_data['client_name']
+
+    now = int(time.time())
+    expired = now - HOSTNAME_MISS_TTL
+    addresses = log_data['client_address']
+    todo = [
+        a
+        for a in dict.fromkeys(addresses)
+        if a not in hostnames or (hostnames[a] is None and checked[a] < expired)
+    ]
+    if todo:
+        with ThreadPoolExecutor(max_workers=_MAX_RESOLVER_THREADS) as executor:
+            resolved = list(zip(todo, executor.map(_resolve_hostname, todo)))
+
+        hostnames.update(resolved)
+        with open(hostname_db, mode='ab') as file:
+            file.writelines(_format_hostname(a, n, now) for a, n in resolved)
+
+    log_data['client_name'] = [hostnames[a] for a in addresses]
 
 # --------------------------------------------------------------------------------------
 
@@ -253,85 +712,129 @@ def enrich_client_location(log_data: LogData, location_db: Path) -> None:
     assert not log_data['client_city']
     assert not log_data['client_country']
 
-    def append_to_column(key: str, value: object) -> None:
-        log_data[key].append(value)
+    # Look up each distinct address once and then gather the results for all
+    # rows with numpy's fancy indexing.
+    addresses = log_data['client_address']
+    positions = {
+        address: index for index, address in enumerate(dict.fromkeys(addresses))
+    }
+    inverse = np.fromiter(
+        map(positions.__getitem__, addresses), dtype=np.intp, count=len(addresses)
+    )
+
+    count = len(positions)
+    latitudes = np.full(count, math.nan)
+    longitudes = np.full(count, math.nan)
+    cities = np.full(count, None, dtype=object)
+    countries = np.full(count, None, dtype=object)
+    pool: StringPool = {}
 
     with LocationDatabaseReader(os.fspath(location_db)) as reader:
-        cache: dict[str, Optional[LocationData]] = dict()
+        for index, address in enumerate(positions):
+            try:
+                location: LocationData = reader.city(address)
+            except AddressNotFoundError:
+                continue
+
+            if (latitude := location.location.latitude) is not None:
+                latitudes[index] = latitude
+            if (longitude := location.location.longitude) is not None:
+                longitudes[index] = longitude
+            cities[index] = _pooled(location.city.name, pool)
+            countries[index] = _pooled(location.country.iso_code, pool)
+
+    log_data['client_latitude'] = latitudes[inverse]
+    log_data['client_longitude'] = longitudes[inverse]
+    log_data['client_city'] = cities[inverse].tolist()
+    log_data['client_country'] = countries[inverse].tolist()
 
-        for address in log_data['client_address']:
-            if address not in cache:
-                try:
-                    cache[address] = reader.city(address)
-                except AddressNotFoundError:
-                    cache[address] = None
-
-            location = cache[address]
-            if location is None:
-                append_to_column('client_latitude', math.nan)
-                append_to_column('client_longitude', math.nan)
-                append_to_column('client_city', None)
-                append_to_column('client_country', None)
-            else:
-                append_to_column('client_latitude', location.location.latitude)
-                append_to_column('client_longitude', location.location.longitude)
-                append_to_column('client_city', location.city.name)
-                append_to_column('client_country', location.country.iso_code)
+# --------------------------------------------------------------------------------------
 
 
-# --------------------------------------------------------------------------------------
+def _version_of(part: Mapping[str, Any]) -> str:
+    """Join the non-empty version components of a ua-parser result part."""
+    get = part.get
+    return '.'.join(
+        [v for v in (get('major'), get('minor'), get('patch'), get('patch_minor')) if v]
+    )
+
+
+_USER_AGENT_COLUMNS = (
+    'agent_family',
+    'agent_version',
+    'os_family',
+    'os_version',
+    'device_family',
+    'device_brand',
+    'device_model',
+    'is_bot1',
+    'is_bot2',
+)
+
+_NO_USER_AGENT = (None, None, None, None, None, None, None, False, False)
+
 
+def _describe_user_agent(
+    user_agent: Optional[str], bot_detector: BotDetector
+) -> tuple[Any, ...]:
+    """Determine the values of the user agent columns for the user agent."""
+    if user_agent is None:
+        return _NO_USER_AGENT
 
-_VERSION_COMPONENTS = ('major', 'minor', 'patch', 'patch_minor')
+    parts = parse_user_agent(user_agent)
+    ua = parts['user_agent']
+    os = parts['os']
+    device = parts['device']
+
+    families = (d['family'] for d in (ua, os, device))
+
+    return (
+        ua['family'],
+        _version_of(ua),
+        os['family'],
+        _version_of(os),
+        device['family'],
+        device['brand'] or '',
+        device['model'] or '',
+        'Spider' in families and ua['family'] != 'WhatsApp',
+        bot_detector.test(user_agent),
+    )
+
+
+@cache
+def _get_bot_detector() -> BotDetector:
+    """
+    Get the bot detector. It is created on first use only, since loading and
+    compiling matomo's bot patterns is expensive, and then shared between
+    calls. Its cache of previous results is not, since it would otherwise grow
+    with every distinct user agent ever seen.
+    """
+    return BotDetector()
 
 
 def enrich_user_agent(log_data: LogData) -> None:
-    assert not log_data['agent_family']
-    assert not log_data['agent_version']
-    assert not log_data['os_family']
-    assert not log_data['os_version']
-    assert not log_data['device_family']
-    assert not log_data['device_brand']
-    assert not log_data['device_model']
-    assert not log_data['is_bot1']
-    assert not log_data['is_bot2']
-
-    def append_to_column(key: str, value: object) -> None:
-        log_data[key].append(value)
-
-    bot_detector = BotDetector()
-
-    for user_agent in log_data['user_agent']:
-        if user_agent is None:
-            append_to_column('agent_family', None)
-            append_to_column('agent_version', None)
-            append_to_column('os_family', None)
-            append_to_column('os_version', None)
-            append_to_column('device_family', None)
-            append_to_column('device_brand', None)
-            append_to_column('device_model', None)
-            append_to_column('is_bot1', False)
-            append_to_column('is_bot2', False)
-            continue
-
-        parts = parse_user_agent(user_agent)
-        ua = parts['user_agent']
-        os = parts['os']
-        device = parts['device']
-
-        append_to_column('agent_family', ua['family'])
-        versions = (cast(Optional[str], ua.get(key)) for key in _VERSION_COMPONENTS)
-        append_to_column('agent_version', '.'.join(v for v in versions if v))
-        append_to_column('os_family', os['family'])
-        versions = (cast(Optional[str], os.get(key)) for key in _VERSION_COMPONENTS)
-        append_to_column('os_version', '.'.join(v for v in versions if v))
-        append_to_column('device_family', device['family'])
-        append_to_column('device_brand', device['brand'] or '')
-        append_to_column('device_model', device['model'] or '')
-        families = (d['family'] for d in (ua, os, device))
-        append_to_column('is_bot1', 'Spider' in families and ua['family'] != 'WhatsApp')
-        append_to_column('is_bot2', bot_detector.test(user_agent))
+    for key in _USER_AGENT_COLUMNS:
+        assert not log_data[key]
 
+    # User agents repeat heavily. Hence, parse each distinct one only once.
+    user_agents = log_data['user_agent']
+    bot_detector = _get_bot_detector()
+    try:
+        descriptions = {
+            user_agent: _describe_user_agent(user_agent, bot_detector)
+            for user_agent in dict.fromkeys(user_agents)
+        }
+    finally:
+        bot_detector.clear_cache()
+
+    # The bot flags are stored as numpy arrays of the schema's boolean type.
+    rows = [descriptions[user_agent] for user_agent in user_agents]
+    for index, key in enumerate(_USER_AGENT_COLUMNS):
+        column = [row[index] for row in rows]
+        dtype = ENRICHED_COLUMNS.get(key)
+        log_data[key] = (
+            np.array(column, dtype=dtype) if isinstance(dtype, np.dtype) else column
+        )
 
 # --------------------------------------------------------------------------------------
 
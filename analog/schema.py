@@ -1,4 +1,5 @@
 from collections.abc import Sized
+from hashlib import sha256
 from types import MappingProxyType
 from typing import NamedTuple
 
@@ -20,17 +21,24 @@ Float64Dtype = np.dtype(float)
 Int16Dtype = np.dtype('int16')
 Int32Dtype = np.dtype('int32')
 StringDtype = pd.StringDtype()
+TimestampDtype = pd.DatetimeTZDtype('ns', 'UTC')
+
+ContentTypeDtype = pd.CategoricalDtype(categories=list(ContentType))
+HttpMethodDtype = pd.CategoricalDtype(categories=list(HttpMethod))
+HttpProtocolDtype = pd.CategoricalDtype(categories=list(HttpProtocol), ordered=True)
+HttpSchemeDtype = pd.CategoricalDtype(categories=list(HttpScheme))
+HttpStatusDtype = pd.CategoricalDtype(categories=list(HttpStatus), ordered=True)
 
 
 ACCESS_LOG_COLUMNS: MappingProxyType[str, np.dtype | ExtensionDtype] = MappingProxyType(
     {
         "client_address": StringDtype,
-        "timestamp": pd.DatetimeTZDtype('ns', 'UTC'),
-        "method": pd.CategoricalDtype(categories=list(HttpMethod)),
+        "timestamp": TimestampDtype,
+        "method": HttpMethodDtype,
         "path": StringDtype,
         "query": StringDtype,
         "fragment": StringDtype,
-        "protocol": pd.CategoricalDtype(categories=list(HttpProtocol), ordered=True),
+        "protocol": HttpProtocolDtype,
         "status": Int16Dtype,
         "size": Int32Dtype,
         "referrer": StringDtype,
@@ -43,9 +51,9 @@ ACCESS_LOG_COLUMNS: MappingProxyType[str, np.dtype | ExtensionDtype] = MappingPr
 DERIVED_COLUMNS: MappingProxyType[str, np.dtype | ExtensionDtype] = MappingProxyType(
     {
         "cool_path": StringDtype,
-        "content_type": pd.CategoricalDtype(categories=list(ContentType)),
-        "status_class": pd.CategoricalDtype(categories=list(HttpStatus), ordered=True),
-        "referrer_scheme": pd.CategoricalDtype(categories=list(HttpScheme)),
+        "content_type": ContentTypeDtype,
+        "status_class": HttpStatusDtype,
+        "referrer_scheme": HttpSchemeDtype,
         "referrer_host": StringDtype,
         "referrer_path": StringDtype,
         "referrer_query": StringDtype,
@@ -118,24 +126,43 @@ class NullConstraint(NamedTuple):
         If this constraint does not hold for the given dataframe, signal a
         validation error.
         """
-        column1 = self.equal[0]
-        values1 = df[column1].notnull()
-
-        for column2 in self.equal[1:]:
-            values2 = df[column2].notnull()
+        self.check(
+            df[list(self.equal)].notna().to_numpy(dtype=bool),
+            df[list(self.at_least)].notna().to_numpy(dtype=bool),
+            df.index,
+        )
 
-            if values2.ne(values1).any():
-                raise AttributeError(
-                    f'{column1} and {column2} mix null and non-null values in same row'
-                )
-
-        for column2 in self.at_least:
-            values2 = df[column2].notnull()
+    def check(self, equal: np.ndarray, at_least: np.ndarray, index: pd.Index) -> None:
+        """
+        If this constraint does not hold for the given boolean matrices, which
+        have one column per equal and at-least column, respectively, with each
+        value indicating whether the corresponding cell is non-null, signal a
+        validation error. The index provides the labels of the matrices' rows.
+        """
+        column1 = self.equal[0]
+        present1 = equal[:, :1]
+
+        mixed = equal != present1
+        mixed_columns = mixed.any(axis=0)
+        if mixed_columns.any():
+            column = int(mixed_columns.argmax())
+            column2 = self.equal[column]
+            label = index[int(mixed[:, column].argmax())]
+            raise AttributeError(
+                f'{column1} and {column2} mix null and non-null values '
+                f'at index {label}'
+            )
 
-            if values2.__or__(values1).ne(values1).any():
-                raise AttributeError(
-                    f'{column2} has non-null values in rows that are null in {column1}'
-                )
+        spilled = at_least & ~present1
+        spilled_columns = spilled.any(axis=0)
+        if spilled_columns.any():
+            column = int(spilled_columns.argmax())
+            column2 = self.at_least[column]
+            label = index[int(spilled[:, column].argmax())]
+            raise AttributeError(
+                f'{column2} has non-null value at index {label} '
+                f'that is null in {column1}'
+            )
 
 
 NULL_CONSTRAINTS = (
@@ -162,17 +189,114 @@ NULL_CONSTRAINTS = (
 )
 
 
+# Validation compares all columns but the timestamp against their expected
+# types. The timestamp only needs to be timezone-aware and in UTC.
+_EXPECTED_DTYPES = pd.Series(
+    {column: dtype for column, dtype in SCHEMA.items() if column != 'timestamp'},
+    dtype=object,
+)
+
+
+# The non-null columns in schema order, so that errors are reported
+# deterministically.
+_NON_NULL_COLUMNS = [column for column in SCHEMA if column in NON_NULL_COLUMN_NAMES]
+
+
+# All columns subject to null constraints, as well as each constraint's equal
+# and at-least columns as indices into them. This lets validate() determine
+# the presence of values for all constrained columns in one go.
+_CONSTRAINED_COLUMNS = list(
+    dict.fromkeys(
+        column
+        for constraint in NULL_CONSTRAINTS
+        for column in (*constraint.equal, *constraint.at_least)
+    )
+)
+_CONSTRAINT_INDICES = tuple(
+    (
+        constraint,
+        [_CONSTRAINED_COLUMNS.index(column) for column in constraint.equal],
+        [_CONSTRAINED_COLUMNS.index(column) for column in constraint.at_least],
+    )
+    for constraint in NULL_CONSTRAINTS
+)
+
+
+# The attribute marking dataframes as validated and the schema version they
+# were validated against. The version changes whenever the schema does.
+VALIDATED_ATTRIBUTE = 'analog_schema'
+SCHEMA_VERSION = sha256(
+    repr([(column, dtype) for column, dtype in SCHEMA.items()]).encode('utf8')
+).hexdigest()[:16]
+
+
 def coerce(data: pd.DataFrame) -> pd.DataFrame:
-    """Coerce the given log dataframe to the log schema."""
-    return data.astype(SCHEMA)
+    """
+    Coerce the given log dataframe to the log schema. Only columns that do not
+    yet have the expected type are converted. If all columns already do, this
+    function returns a copy of the given dataframe. Either way, the result never
+    shares data with the given dataframe.
+    """
+    dtypes = data.dtypes
+    conversions = {
+        column: dtype
+        for column, dtype in SCHEMA.items()
+        if column not in dtypes or dtypes[column] != dtype
+    }
+    if not conversions:
+        return data.copy()
+
+    coerced = data.astype(conversions)
+    coerced.attrs.pop(VALIDATED_ATTRIBUTE, None)
+    return coerced
+
+
+# String columns that tend to have few distinct values in practice.
+CATEGORIZABLE_COLUMNS = (
+    'user_agent',
+    'referrer_host',
+    'client_city',
+    'client_country',
+    'agent_family',
+    'os_family',
+    'device_family',
+    'device_brand',
+)
 
 
-def validate(df: pd.DataFrame) -> None:
+def categorize(data: pd.DataFrame, threshold: float = 0.05) -> pd.DataFrame:
+    """
+    Convert low-cardinality string columns of the given log dataframe to
+    categoricals. This function considers the `CATEGORIZABLE_COLUMNS` and
+    converts those whose ratio of distinct values to rows falls below the
+    threshold. Since the result does not conform to the log schema anymore,
+    this function should only be applied after validation, if at all.
+    """
+    rows = len(data)
+    if rows == 0:
+        return data
+
+    converted = {
+        column: 'category'
+        for column in CATEGORIZABLE_COLUMNS
+        if column in data.columns and data[column].nunique() / rows < threshold
+    }
+    return data.astype(converted) if converted else data
+
+
+def validate(df: pd.DataFrame, *, trust_cache: bool = False) -> None:
     """
     Validate the given dataframe. This function checks that the dataframe has
     the expected columns with the expected types, non-null columns do not
     contain null values, and columns with correlated null values in fact observe
     those correlations.
+
+    Upon success, this function records the schema version in the dataframe's
+    `attrs`. If `trust_cache` is true and the dataframe already carries the
+    current version, this function only checks columns and types, skipping the
+    scans over all rows. Since pandas propagates `attrs` to derived dataframes,
+    including copies that are subsequently modified, callers should only trust
+    the cache for dataframes they know to be unmodified.
     """
 
     def plural(s: Sized) -> str:
@@ -182,45 +306,68 @@ def validate(df: pd.DataFrame) -> None:
     # No extra or missing columns
 
     columns = frozenset(df.columns)
-    extras = columns - COLUMN_NAMES
-    if len(extras) > 0:
+    if columns ^ COLUMN_NAMES:
+        missing = sorted(COLUMN_NAMES - columns)
+        if missing:
+            formatted_missing = ", ".join(f'"{m}"' for m in missing)
+            raise AttributeError(
+                f'dataframe lacks column{plural(missing)} {formatted_missing}'
+            )
+
+        extras = sorted(columns - COLUMN_NAMES)
         import warnings
-        formatted_extras = (f'"{e}"' for e in extras)
-        warnings.warn(f'dataframe has extra columns {", ".join(formatted_extras)}')
+        formatted_extras = ", ".join(f'"{e}"' for e in extras)
+        warnings.warn(f'dataframe has extra column{plural(extras)} {formatted_extras}')
 
     # ----------------------------------------------------------------------------------
     # Columns have expected types
 
     maltyped = []
-    for column, dtype in SCHEMA.items():
-        if column == 'timestamp':
-            # Allow for arbitrary units, datetime.timezone as well as pytz.UTC
-            dtype = df.dtypes[column]
-            if not isinstance(dtype, pd. DatetimeTZDtype):
-                maltyped.append(f'{column} is not a datetime')
-            if str(dtype.tz) != 'UTC':
-                maltyped.append(f'{column} is not UTC but {dtype.tz}')
-
-        elif df.dtypes[column] != dtype :
+    dtypes = df.dtypes
+
+    # Allow for arbitrary units, datetime.timezone as well as pytz.UTC
+    dtype = dtypes['timestamp']
+    if not isinstance(dtype, pd.DatetimeTZDtype):
+        maltyped.append('timestamp is not a datetime')
+    elif str(dtype.tz) != 'UTC':
+        maltyped.append(f'timestamp is not UTC but {dtype.tz}')
+
+    # Compare all other types in one go and only format errors on mismatch.
+    actual = dtypes.reindex(_EXPECTED_DTYPES.index)
+    mismatched = actual.ne(_EXPECTED_DTYPES)
+    if mismatched.any():
+        for column in _EXPECTED_DTYPES.index[mismatched.to_numpy()]:
             maltyped.append(
-                f'{column} has type {df.dtypes[column]} instead of {dtype}'
+                f'{column} has type {dtypes[column]} '
+                f'instead of {_EXPECTED_DTYPES[column]}'
             )
     if maltyped:
         raise AttributeError('; '.join(maltyped))
 
+    if trust_cache and df.attrs.get(VALIDATED_ATTRIBUTE) == SCHEMA_VERSION:
+        return
+
     # ----------------------------------------------------------------------------------
     # Non-null columns contain no unexpected nulls
 
-    for column in NON_NULL_COLUMN_NAMES:
-        nulls = df[column].isna().sum()
-        if nulls != 0:
-            raise AttributeError(
+    # Scan all columns for nulls at once and only count them on error.
+    is_null = df[_NON_NULL_COLUMNS].isna()
+    has_nulls = is_null.any(axis=0)
+    if has_nulls.any():
+        null_counts = is_null.loc[:, has_nulls].sum(axis=0)
+        raise AttributeError(
+            '; '.join(
                 f'column "{column}" unexpectedly contains '
                 f'{nulls} null{"s" if nulls != 1 else ""}'
+                for column, nulls in null_counts.items()
             )
+        )
 
     # ----------------------------------------------------------------------------------
     # Constraints on non-null values hold
 
-    for constraint in NULL_CONSTRAINTS:
-        constraint.apply_to(df)
+    present = df[_CONSTRAINED_COLUMNS].notna().to_numpy(dtype=bool)
+    for constraint, equal, at_least in _CONSTRAINT_INDICES:
+        constraint.check(present[:, equal], present[:, at_least], df.index)
+
+    df.attrs[VALIDATED_ATTRIBUTE] = SCHEMA_VERSION
@@ -1,8 +1,47 @@
 import calendar
+from functools import lru_cache
+from typing import TypeAlias
 
 import matplotlib as mp
 
 from .analyzer import Summary
+from .month_in_year import MonthInYear
+
+
+_Ticks: TypeAlias = tuple[tuple[int, ...], tuple[str, ...]]
+
+
+@lru_cache(maxsize=16)
+def _compute_ticks(
+    start: MonthInYear, stop: MonthInYear
+) -> tuple[_Ticks, _Ticks, _Ticks]:
+    """
+    Compute the quarterly, monthly, and yearly ticks for the x-axis spanning
+    the given months. Since the ticks only depend on the range, they are
+    cached.
+    """
+    # Month labels, once a quarter
+    quarter_start = start.start_of_period(3, next=True)
+    quarter_stop = stop.start_of_period(3)
+    offsets = range(quarter_start - start, quarter_stop - start + 1, 3)
+    quarters = tuple(offsets), tuple(
+        calendar.month_abbr[(start.month - 1 + offset) % 12 + 1] for offset in offsets
+    )
+
+    # Minor ticks for all other months
+    offsets = range(0, stop - start + 1)
+    positions = tuple(o for o in offsets if (start.month - 1 + o) % 3 != 0)
+    months = positions, ("",) * len(positions)
+
+    # Year labels, for every full year
+    year_start = start.start_of_period(12, next=True)
+    year_stop = stop.start_of_period(12)
+    offsets = range(year_start - start, year_stop - start + 1, 12)
+    years = tuple(offset + 6 for offset in offsets), tuple(
+        f"└──\u2009{year_start.year + index}\u2009──┘" for index in range(len(offsets))
+    )
+
+    return quarters, months, years
 
 
 def plot_requests_and_page_views(summary: Summary) -> object:
@@ -17,48 +56,19 @@ def plot_requests_and_page_views(summary: Summary) -> object:
     # Remove x-axis label
     ax.set_xlabel(None)
 
-    # Month labels, once a quarter
-    quarter_start = summary.start.start_of_period(3, next=True)
-    quarter_stop = summary.stop.start_of_period(3)
-
-    positions = []
-    labels = []
-
-    cursor = quarter_start
-    while cursor <= quarter_stop:
-        positions.append(cursor - summary.start)
-        labels.append(calendar.month_abbr[cursor.month])
-        cursor += 3
+    quarters, months, years = _compute_ticks(summary.start, summary.stop)
 
+    # Month labels, once a quarter
+    positions, labels = quarters
     ax.tick_params(axis="x", labelrotation=50, labelsize="small")
     ax.set_xticks(positions, labels=labels)
 
     # Minor ticks for all other months
-    positions = []
-    labels = []
-
-    cursor = summary.start
-    while cursor <= summary.stop:
-        if (cursor.month - 1) % 3 != 0:
-            positions.append(cursor - summary.start)
-            labels.append("")
-        cursor = cursor.next()
-
+    positions, labels = months
     ax.set_xticks(positions, labels=labels, minor=True)
 
     # Year labels, for every full year
-    year_start = summary.start.start_of_period(12, next=True)
-    year_stop = summary.stop.start_of_period(12)
-
-    positions = []
-    labels = []
-
-    cursor = year_start
-    while cursor <= year_stop:
-        positions.append(cursor - summary.start + 6)
-        labels.append(f"└──\u2009{cursor.year}\u2009──┘")
-        cursor += 12
-
+    positions, labels = years
     sec = ax.secondary_xaxis(location=-0.1)
     sec.tick_params(axis="x", length=0, labelsize="small")
     sec.set_xticks(positions, labels=labels)
@@ -0,0 +1,90 @@
+import gzip
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from analog.data_manager import DataManager
+from analog.error import StorageError
+from analog.parser import (
+    LineParser,
+    load_hostnames,
+    LogData,
+    parse_common_log_format,
+)
+
+from test_parser import LINES
+
+
+MONTHS = ("Jan-2022", "Feb-2022", "Mar-2022")
+
+
+def make_root(root: Path) -> Path:
+    (root / "access-logs").mkdir()
+    (root / "location-db").mkdir()
+    (root / "location-db" / "city-2022-01-01.mmdb").touch()
+
+    for index, month in enumerate(MONTHS):
+        # Give each month a different number of lines and leave one uncompressed.
+        text = "".join(line + "\n" for line in LINES[: index + 1])
+        path = root / "access-logs" / f"apparebit.com-ssl_log-{month}"
+        if index == 1:
+            path.write_text(text, encoding="utf8")
+        else:
+            compressed = path.with_name(path.name + ".gz")
+            with gzip.open(compressed, mode="wt", encoding="utf8") as file:
+                file.write(text)
+
+    return root
+
+
+def fake_enrich_log(log_data: LogData) -> pd.DataFrame:
+    return pd.DataFrame({"status": log_data["status"]})
+
+
+@pytest.mark.parametrize(
+    "line_parser",
+    [parse_common_log_format, lambda line: parse_common_log_format(line)],
+    ids=["parallel", "serial"],
+)
+def test_ingest_monthly_logs(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, line_parser: LineParser
+) -> None:
+    manager = DataManager(make_root(tmp_path), line_parser=line_parser)
+    monkeypatch.setattr(manager, "_enrich_log", fake_enrich_log)
+
+    manager.ingest_monthly_logs()
+
+    enriched = tmp_path / "enriched-logs"
+    for index, month in enumerate(("2022-01", "2022-02", "2022-03")):
+        frame = pd.read_parquet(enriched / f"apparebit.com-{month}.parquet")
+        assert len(frame) == index + 1
+
+    # Ingesting again has nothing left to do.
+    manager.ingest_monthly_logs()
+    assert manager._did_ingest_access_log is False
+
+
+def test_duplicate_monthly_logs(tmp_path: Path) -> None:
+    root = make_root(tmp_path)
+    (root / "access-logs" / "apparebit.com-ssl_log-Jan-2022").touch()
+
+    with pytest.raises(StorageError, match="two access logs for 2022-01"):
+        DataManager(root).ingest_monthly_logs()
+
+
+def test_legacy_hostname_db(tmp_path: Path) -> None:
+    root = make_root(tmp_path)
+    legacy = {"1.1.1.1": "one.example.com", "2.2.2.2": None}
+    with open(root / "hostnames.json", mode="w", encoding="utf8") as file:
+        json.dump(legacy, file)
+
+    DataManager(root)
+    # Failed lookups from the legacy database are retried on the next run.
+    assert load_hostnames(root / "hostnames.jsonl") == (legacy, {"2.2.2.2": 0}, False)
+
+    # An existing database is never overwritten by the legacy one.
+    (root / "hostnames.jsonl").write_text('{"ip":"3.3.3.3","name":"three.org"}\n')
+    DataManager(root)
+    assert load_hostnames(root / "hostnames.jsonl")[0] == {"3.3.3.3": "three.org"}
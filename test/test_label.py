@@ -1,4 +1,9 @@
+import posixpath
+
+import pytest
+
 from analog.label import (
+    _extension_of,
     HttpScheme,
     HttpMethod,
     HttpProtocol,
@@ -37,8 +42,30 @@ def test_content_type() -> None:
         assert ContentType.of(path) == ContentType[type]
 
 
+def test_extension() -> None:
+    for path in (
+        "",
+        "/",
+        "/blog",
+        "/blog/",
+        "/index.html",
+        "/archive.tar.gz",
+        "/.well-known/security.txt",
+        "/.htaccess",
+        "/..",
+        "/...txt",
+        "/a.b/c",
+        "file.",
+    ):
+        assert _extension_of(path) == posixpath.splitext(path)[1]
+
+
 def test_status() -> None:
     assert HttpStatus.of(200) == HttpStatus.SUCCESSFUL
     assert HttpStatus.of(308) == HttpStatus.REDIRECTED
     assert HttpStatus.of(418) == HttpStatus.CLIENT_ERROR
     assert HttpStatus.of(503) == HttpStatus.SERVER_ERROR
+
+    for status in (99, 600):
+        with pytest.raises(ValueError):
+            HttpStatus.of(status)
@@ -1,6 +1,8 @@
+from calendar import monthrange
 from datetime import datetime, timedelta, timezone
 from analog.month_in_year import MonthInYear, MonthInYearly
 import pandas as pd
+import pytest
 
 
 def test_month_in_year() -> None:
@@ -68,3 +70,18 @@ def test_month_in_year() -> None:
     assert stop.astimezone(timezone.utc) == datetime(
         2020, 7, 1, 4, 59, 59, 999999, timezone.utc
     )
+
+
+def test_days() -> None:
+    for year in (1900, 2000, 2019, 2020, 2024, 2100):
+        for month in range(1, 13):
+            assert MonthInYear(year, month).days() == monthrange(year, month)[1]
+
+    with pytest.raises(ValueError):
+        MonthInYear(2020, 13).days()
+
+
+def test_malformed_month_in_year() -> None:
+    for text in ("2020/04", "2020-4a", "２０２０-04"):
+        with pytest.raises(ValueError):
+            MonthInYear.of(text)
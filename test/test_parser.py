@@ -1,5 +1,14 @@
+from collections import defaultdict
 from datetime import datetime, timezone
+import gzip
+import importlib.util
+import json
+from pathlib import Path
+import sys
 
+import pytest
+
+import analog.parser
 from analog.label import (
     ContentType,
     HttpMethod,
@@ -8,9 +17,21 @@ from analog.label import (
     HttpStatus,
 )
 from analog.parser import (
+    _REFERRER,
+    _split_common_log_format,
+    _split_referrer,
     coerce_log_record,
+    COMMON_LOG_FORMAT,
+    enrich_client_name,
+    enrich_user_agent,
     fill_log_record,
+    HOSTNAME_MISS_TTL,
+    load_hostnames,
+    parse_all_lines,
     parse_common_log_format,
+    parse_timestamp,
+    read_log_lines,
+    save_hostnames,
     to_cool_path,
 )
 
@@ -132,9 +153,231 @@ def test_parser() -> None:
         assert record == data
 
 
+TRICKY_LINES = [
+    *LINES,
+    LINES[0] + '\n',
+    LINES[0] + '\n\n',
+    '1.1.1.1 - - [13/Aug/2022:01:02:03 +0000] "GET /a?b#c?d HTTP/1.1" 200 -',
+    '1.1.1.1 - - [13/Aug/2022:01:02:03 +0000] "get /a#b?c HTTP/1.0" 200 1 s.com 2.2.2.2',
+    '1.1.1.1 - - [13/Aug/2022:01:02:03 +0000] "GET / HTTP/1.1" 200 1 "-" "a\\"b"',
+    '1.1.1.1 - - [13/Aug/2022:01:02:03 +0000] "GET / HTTP/1.2" 200 1',
+    '1.1.1.1 - - [13/Aug/2022:01:02:03 +0000] "GET / HTTP/1.1" 20 1',
+    '1.1.1.1 - - [13/Aug/2022:01:02:03 +0000] "GET / HTTP/1.1" 200 1 "-"',
+    '1.1.1.1 - - [] "GET / HTTP/1.1" 200 1',
+    '::1 - - [13/Aug/2022:01:02:03 +0000] "GET / HTTP/1.1" 200 1',
+]
+
+
+def test_split_common_log_format() -> None:
+    for line in TRICKY_LINES:
+        match = COMMON_LOG_FORMAT.match(line)
+        expected = match.groupdict() if match else None
+
+        fields = _split_common_log_format(line)
+        assert fields is None or fields == expected
+        assert parse_common_log_format(line) == expected
+
+    for line in LINES:
+        assert _split_common_log_format(line) is not None
+
+
+def test_parse_timestamp() -> None:
+    for text in (
+        '13/Aug/2022:01:02:03 +0000',
+        '13/Aug/2022:03:32:03 +0230',
+        '12/Aug/2022:20:02:03 -0500',
+        '12/aug/2022:20:02:03 -0500',
+        '13/Aug/2022:01:02:03 +00:00',
+        '3/Aug/2022:01:02:03 +0000',
+    ):
+        expected = datetime.strptime(text, '%d/%b/%Y:%H:%M:%S %z')
+        actual = parse_timestamp(text)
+        assert actual == expected
+        assert actual.tzinfo == timezone.utc
+        assert parse_timestamp(text) is actual
+
+    assert parse_timestamp('13/Aug/2022:03:32:03 +0230') == datetime(
+        2022, 8, 13, 1, 2, 3, tzinfo=timezone.utc
+    )
+
+    for text in (
+        '13/Aug/2022:01:02:03 +0070',
+        '31/Feb/2022:01:02:03 +0000',
+        '13/Aug/2022:01:02:03',
+    ):
+        with pytest.raises(ValueError):
+            parse_timestamp(text)
+
+
+def test_read_log_lines(tmp_path: Path) -> None:
+    text = ''.join(line + '\n' for line in LINES)
+
+    plain = tmp_path / 'access.log'
+    plain.write_text(text, encoding='utf8')
+    compressed = tmp_path / 'access.log.gz'
+    with gzip.open(compressed, mode='wt', encoding='utf8') as file:
+        file.write(text)
+    empty = tmp_path / 'empty.log'
+    empty.touch()
+
+    assert list(read_log_lines(plain)) == list(read_log_lines(compressed))
+    assert [line.rstrip('\n') for line in read_log_lines(plain)] == LINES
+    assert list(read_log_lines(empty)) == []
+
+    for index, text in enumerate(('a\r\nb\rc\n', 'a\rb', 'a\r', '\r\n\r', 'a\nb')):
+        plain = tmp_path / f'newlines-{index}.log'
+        plain.write_bytes(text.encode('utf8'))
+        compressed = tmp_path / f'newlines-{index}.log.gz'
+        with gzip.open(compressed, mode='wb') as file:
+            file.write(text.encode('utf8'))
+        assert list(read_log_lines(plain)) == list(read_log_lines(compressed))
+
+
+def test_split_referrer() -> None:
+    for referrer in (
+        'https://example.com',
+        'https://example.com/some/path',
+        'http://Example.com:8080/a/b?c=d&e=f#g',
+        'https://example.com?q=/a#f',
+        'https://example.com#f?q',
+        'https://',
+        'https://example.com/a\nb',
+        'HTTPS://example.com/',
+        'android-app://com.google.android.gm/',
+        '-',
+    ):
+        match = _REFERRER.match(referrer)
+        expected = None if match is None else match.group(*_REFERRER.groupindex)
+        assert _split_referrer(referrer) == expected
+
+
 def test_to_cool_path() -> None:
     assert to_cool_path("/path/index.html") == "/path"
     assert to_cool_path("/path/to.html") == "/path/to"
     assert to_cool_path("/index.html") == "/"
     assert to_cool_path("") == "/"
     assert to_cool_path("/nothing/changes.xml") == "/nothing/changes.xml"
+
+
+HOSTNAMES = {'1.1.1.1': 'one.example.com', '2.2.2.2': None, '3.3.3.3': 'three.org'}
+
+
+def test_hostname_db(tmp_path: Path) -> None:
+    path = tmp_path / 'hostnames.jsonl'
+    assert load_hostnames(path) == ({}, {}, False)
+
+    save_hostnames(path, HOSTNAMES, {'2.2.2.2': 665})
+    assert load_hostnames(path) == (HOSTNAMES, {'2.2.2.2': 665}, False)
+
+    # Appended entries override earlier ones.
+    with open(path, mode='ab') as file:
+        file.write(b'{"ip":"2.2.2.2","name":"two.net"}\n')
+        file.write(b'{"ip":"4.4.4.4","name":null,"checked":42}\n')
+    hostnames, checked, needs_compaction = load_hostnames(path)
+    assert hostnames == HOSTNAMES | {'2.2.2.2': 'two.net', '4.4.4.4': None}
+    assert checked == {'4.4.4.4': 42}
+    assert not needs_compaction
+
+    # Mostly redundant entries call for compaction, which removes them.
+    with open(path, mode='ab') as file:
+        for _ in range(5):
+            file.write(b'{"ip":"1.1.1.1","name":"one.example.com"}\n')
+    assert load_hostnames(path) == (hostnames, checked, True)
+    save_hostnames(path, hostnames, checked)
+    assert len(path.read_bytes().splitlines()) == 4
+    assert load_hostnames(path) == (hostnames, checked, False)
+
+    # A damaged trailing line is skipped and calls for compaction, too.
+    with open(path, mode='ab') as file:
+        file.write(b'{"ip":"5.5.5.5","na')
+    assert load_hostnames(path) == (hostnames, checked, True)
+
+    # Entries from legacy databases lack the time of failed lookups.
+    path.write_text(json.dumps({'ip': '2.2.2.2', 'name': None}) + '\n')
+    assert load_hostnames(path) == ({'2.2.2.2': None}, {'2.2.2.2': 0}, False)
+
+
+def test_hostname_db_without_orjson(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Load a second copy of the parser module while orjson cannot be imported.
+    monkeypatch.setitem(sys.modules, 'orjson', None)
+    path = Path(__file__).parent.parent / 'analog' / 'parser.py'
+    spec = importlib.util.spec_from_file_location('analog._parser_no_orjson', path)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    assert module._load_json_line is json.loads
+
+    # Both implementations read what the other one wrote.
+    path = tmp_path / 'hostnames.jsonl'
+    module.save_hostnames(path, HOSTNAMES, {'2.2.2.2': 665})
+    assert load_hostnames(path) == (HOSTNAMES, {'2.2.2.2': 665}, False)
+    save_hostnames(path, HOSTNAMES, {'2.2.2.2': 42})
+    assert module.load_hostnames(path) == (HOSTNAMES, {'2.2.2.2': 42}, False)
+
+
+def test_hostname_miss_expiry(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1_700_000_000
+    path = tmp_path / 'hostnames.jsonl'
+    entries = [
+        {'ip': '1.1.1.1', 'name': 'one.example.com'},
+        # A fresh miss, an expired miss, and a legacy miss without check time.
+        {'ip': '2.2.2.2', 'name': None, 'checked': now - 60},
+        {'ip': '3.3.3.3', 'name': None, 'checked': now - HOSTNAME_MISS_TTL - 1},
+        {'ip': '4.4.4.4', 'name': None},
+    ]
+    path.write_text(''.join(json.dumps(entry) + '\n' for entry in entries))
+
+    resolved: list[str] = []
+
+    def resolve(address: str) -> str:
+        resolved.append(address)
+        return f'host-{address}.example.com'
+
+    monkeypatch.setattr(analog.parser, '_resolve_hostname', resolve)
+    monkeypatch.setattr(analog.parser.time, 'time', lambda: now)
+
+    log_data: analog.parser.LogData = defaultdict(list)
+    log_data['client_address'] = ['1.1.1.1', '2.2.2.2', '3.3.3.3', '4.4.4.4', '3.3.3.3']
+    enrich_client_name(log_data, path)
+
+    assert sorted(resolved) == ['3.3.3.3', '4.4.4.4']
+    assert log_data['client_name'] == [
+        'one.example.com',
+        None,
+        'host-3.3.3.3.example.com',
+        'host-4.4.4.4.example.com',
+        'host-3.3.3.3.example.com',
+    ]
+
+    # The retried lookups were appended to the database.
+    assert len(path.read_bytes().splitlines()) == 6
+    hostnames, checked, _ = load_hostnames(path)
+    assert hostnames['3.3.3.3'] == 'host-3.3.3.3.example.com'
+    assert hostnames['4.4.4.4'] == 'host-4.4.4.4.example.com'
+    assert checked == {'2.2.2.2': now - 60}
+
+
+def test_enrich_user_agent() -> None:
+    log_data: analog.parser.LogData = defaultdict(list)
+    log_data['user_agent'] = ['bot', SAFARI_15_6, 'bot', None]
+    enrich_user_agent(log_data)
+
+    assert log_data['agent_family'][1] == 'Safari'
+    assert log_data['agent_family'][3] is None
+    assert log_data['is_bot2'].tolist() == [True, False, True, False]
+
+    # The bot detector is shared between calls but its results are not.
+    assert analog.parser._get_bot_detector()._cache == {}
+
+
+def test_parse_all_lines_pools_strings() -> None:
+    log_data = parse_all_lines(iter(LINES * 2))
+    size = len(LINES)
+
+    # Repeated values share one object within the parsed log.
+    for column in ('referrer', 'user_agent', 'referrer_host', 'server_name'):
+        values = log_data[column]
+        assert values[1] is not None
+        assert values[1] is values[1 + size]
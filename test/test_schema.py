@@ -0,0 +1,209 @@
+from collections.abc import Callable
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analog.parser import enrich_user_agent, parse_all_lines
+from analog.schema import (
+    categorize,
+    coerce,
+    NULL_CONSTRAINTS,
+    validate,
+    VALIDATED_ATTRIBUTE,
+)
+
+from test_parser import LINES
+
+
+def log_frame() -> pd.DataFrame:
+    log_data = parse_all_lines(iter(LINES * 2))
+    enrich_user_agent(log_data)
+
+    rows = len(log_data["status"])
+    log_data["client_name"] = ["host.example.com"] * rows
+    log_data["client_latitude"] = np.full(rows, 40.7)
+    log_data["client_longitude"] = np.full(rows, -74.0)
+    log_data["client_city"] = ["New York"] * rows
+    log_data["client_country"] = ["US"] * rows
+    return coerce(pd.DataFrame(log_data))
+
+
+def test_validation_cache() -> None:
+    df = log_frame()
+    assert VALIDATED_ATTRIBUTE not in df.attrs
+    validate(df)
+    assert VALIDATED_ATTRIBUTE in df.attrs
+
+    # Pandas carries the attribute over to copies, even modified ones.
+    copy = df.copy()
+    copy.loc[0, "client_address"] = None
+    assert VALIDATED_ATTRIBUTE in copy.attrs
+
+    # By default, validate() does not trust the attribute.
+    with pytest.raises(AttributeError, match="client_address"):
+        validate(copy)
+
+    # When trusting the cache, validate() skips the scans over all rows...
+    validate(copy, trust_cache=True)
+
+    # ...but still checks types.
+    retyped = df.astype({"status": "int32"})
+    with pytest.raises(AttributeError, match="status has type int32"):
+        validate(retyped, trust_cache=True)
+
+    # Coercion invalidates the cache.
+    assert VALIDATED_ATTRIBUTE not in coerce(retyped).attrs
+
+
+def test_columns() -> None:
+    df = log_frame()
+    validate(df)
+
+    with pytest.raises(AttributeError, match='dataframe lacks column "client_city"'):
+        validate(df.drop(columns="client_city"))
+    with pytest.raises(
+        AttributeError, match='dataframe lacks columns "client_city", "path"'
+    ):
+        validate(df.drop(columns=["path", "client_city"]))
+
+    with pytest.warns(UserWarning, match='dataframe has extra column "extra"$'):
+        validate(df.assign(extra=1))
+    with pytest.warns(UserWarning, match='dataframe has extra columns "a", "b"$'):
+        validate(df.assign(b=1, a=2))
+
+
+def test_types() -> None:
+    df = log_frame()
+
+    with pytest.raises(
+        AttributeError, match="^status has type int32 instead of int16$"
+    ):
+        validate(df.astype({"status": "int32"}))
+    with pytest.raises(
+        AttributeError,
+        match="^method has type object instead of category; "
+        "size has type int64 instead of int32$",
+    ):
+        validate(df.astype({"method": object, "size": "int64"}))
+
+    naive = df.assign(timestamp=df["timestamp"].dt.tz_localize(None))
+    with pytest.raises(AttributeError, match="^timestamp is not a datetime$"):
+        validate(naive)
+
+    berlin = df.assign(timestamp=df["timestamp"].dt.tz_convert("Europe/Berlin"))
+    with pytest.raises(
+        AttributeError, match="^timestamp is not UTC but Europe/Berlin$"
+    ):
+        validate(berlin)
+
+    # Any resolution will do.
+    validate(df.astype({"timestamp": "datetime64[us, UTC]"}))
+
+
+def test_non_null_columns() -> None:
+    df = log_frame()
+    df.loc[1, "path"] = None
+    with pytest.raises(
+        AttributeError, match='^column "path" unexpectedly contains 1 null$'
+    ):
+        validate(df)
+
+    df.loc[[0, 2], "cool_path"] = None
+    with pytest.raises(
+        AttributeError,
+        match='^column "path" unexpectedly contains 1 null; '
+        'column "cool_path" unexpectedly contains 2 nulls$',
+    ):
+        validate(df)
+
+
+def set_null(*columns: str, row: int) -> Callable[[pd.DataFrame], None]:
+    def mutate(df: pd.DataFrame) -> None:
+        df.loc[row, list(columns)] = None
+
+    return mutate
+
+
+@pytest.mark.parametrize(
+    "mutate, message",
+    [
+        (
+            set_null("server_address", row=0),
+            "^server_name and server_address mix null and non-null values "
+            "at index 0$",
+        ),
+        (
+            set_null("referrer_scheme", "referrer_host", row=1),
+            "^referrer_path has non-null value at index 1 that is null in "
+            "referrer_scheme$",
+        ),
+        (
+            set_null("client_longitude", row=2),
+            "^client_latitude and client_longitude mix null and non-null values "
+            "at index 2$",
+        ),
+        (
+            set_null("device_model", row=1),
+            "^agent_family and device_model mix null and non-null values "
+            "at index 1$",
+        ),
+    ],
+    ids=["server", "referrer", "location", "user_agent"],
+)
+def test_null_constraints(mutate: Callable[[pd.DataFrame], None], message: str) -> None:
+    df = log_frame()
+    mutate(df)
+    with pytest.raises(AttributeError, match=message):
+        validate(df)
+
+    # Making all columns null satisfies the constraint again.
+    constraint = next(c for c in NULL_CONSTRAINTS if c.equal[0] in message)
+    df = log_frame()
+    for column in (*constraint.equal, *constraint.at_least):
+        df[column] = df[column].mask(np.ones(len(df), dtype=bool))
+    validate(df)
+
+
+def test_coerce() -> None:
+    df = log_frame()
+    coerced = coerce(df)
+    assert coerced is not df
+    assert coerced.dtypes.equals(df.dtypes)
+
+    # Updating the result leaves the original alone.
+    coerced.loc[0, "path"] = "/changed"
+    assert df.loc[0, "path"] != "/changed"
+
+
+def test_categorize() -> None:
+    # Only two of the categorizable columns are present.
+    df = pd.DataFrame(
+        {
+            "user_agent": ["a"] * 10 + ["b"] * 10,
+            "client_city": [f"city{n}" for n in range(20)],
+            "path": ["/"] * 20,
+        },
+        dtype="string",
+    )
+
+    # 2 distinct user agents in 20 rows is a ratio of 0.1.
+    assert (categorize(df).dtypes == "string").all()
+
+    categorized = categorize(df, threshold=0.2)
+    assert isinstance(categorized["user_agent"].dtype, pd.CategoricalDtype)
+    assert categorized["client_city"].dtype == "string"
+    # Columns that are not categorizable are left alone, however repetitive.
+    assert categorized["path"].dtype == "string"
+    assert categorized["user_agent"].astype("string").equals(df["user_agent"])
+
+    empty = df.iloc[:0]
+    assert categorize(empty, threshold=1.0) is empty
+
+
+def test_null_constraint_index() -> None:
+    # Errors report the index label, not the position, of the offending row.
+    df = log_frame().iloc[3:].set_index(pd.Index([10, 20, 30]))
+    df.loc[30, "server_address"] = None
+    with pytest.raises(AttributeError, match="values at index 30$"):
+        validate(df)